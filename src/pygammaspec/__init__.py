@@ -1,29 +1,218 @@
 
-from os.path import join, dirname
+import numpy as np
+import os
+from os.path import join, dirname, getmtime, isfile, splitext
+from tempfile import NamedTemporaryFile
+from functools import lru_cache
+from typing import Any, Dict
 
-global DEFAULT_GAMMA_DATA
-DEFAULT_GAMMA_DATA = []
 
-gamma_datafile_path = join(dirname(__file__), 'data', 'gamma_data.csv')
+def _load_table(path: str, dtype: np.dtype) -> np.ndarray:
+    """
+    Load a comma separated data table into a structured NumPy array using the C parser of `np.loadtxt`.
+    The leading whitespace left by the `", "` separator is stripped from all the string fields.
+
+    String fields are parsed with the width given in `dtype` and then narrowed to the longest value
+    actually found in the table, so that the memory footprint only depends on the loaded data.
+
+    The parsed table is stored in a binary `.npy` sidecar file next to the original one, which is used
+    in place of the text file as long as it is not older than it and it matches the requested `dtype`.
+    If the sidecar file cannot be written (e.g. read-only installation) the table is parsed every time.
+    The sidecar file is written to a temporary file and then moved in place, so that a concurrent reader
+    never sees a partially written cache, while an unreadable cache is simply parsed again and replaced.
+    """
+    cache_path = splitext(path)[0] + ".npy"
+
+    if isfile(cache_path) and getmtime(cache_path) >= getmtime(path):
+        try:
+            table = np.load(cache_path, allow_pickle=False)
+        except (OSError, ValueError, EOFError):
+            pass
+        else:
+            if _matches_dtype(table.dtype, dtype):
+                return table
+
+    table = np.loadtxt(path, delimiter=",", dtype=dtype)
+
+    fields = []
+    for name in table.dtype.names:
+        if table.dtype[name].kind == "U":
+            table[name] = np.char.strip(table[name])
+            width = int(np.char.str_len(table[name]).max(initial=1))
+            fields.append((name, f"U{width}"))
+        else:
+            fields.append((name, table.dtype[name]))
+
+    table = table.astype(np.dtype(fields))
+
+    temp_path = None
+    try:
+        with NamedTemporaryFile(dir=dirname(cache_path), suffix=".npy", delete=False) as file:
+            temp_path = file.name
+            np.save(file, table, allow_pickle=False)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        if temp_path is not None and isfile(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
 
-with open(gamma_datafile_path, "r") as datafile:
+    return table
 
-        for line in datafile:
 
-            sline = line.strip("\n").split(", ")
-            data = [float(x) if i in [0, 1, 3] else x for i, x in enumerate(sline)]
-            DEFAULT_GAMMA_DATA.append(data)
+def _matches_dtype(stored: np.dtype, requested: np.dtype) -> bool:
+    """
+    Check if a table loaded from the cache is compatible with the requested `dtype`: the fields must
+    match in name and type, with string fields allowed to be narrower than the requested width.
+    """
+    if stored.names != requested.names:
+        return False
 
+    for name in requested.names:
+        if requested[name].kind == "U":
+            if stored[name].kind != "U" or stored[name].itemsize > requested[name].itemsize:
+                return False
+        elif stored[name] != requested[name]:
+            return False
 
-global DEFAULT_X_RAY_DATA
-DEFAULT_X_RAY_DATA = []
+    return True
 
+
+def _build_index(keys: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Build a dictionary mapping each distinct value of `keys` to the (ascending) array of row
+    indices in which it appears.
+    """
+    names, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    rows = np.argsort(inverse, kind="stable")
+    return dict(zip(names.tolist(), np.split(rows, np.cumsum(counts)[:-1])))
+
+
+gamma_datafile_path = join(dirname(__file__), 'data', 'gamma_data.csv')
 x_ray_datafile_path = join(dirname(__file__), 'data', 'x_ray_data.csv')
 
-with open(x_ray_datafile_path, "r") as datafile:
 
-        for line in datafile:
+@lru_cache(maxsize=None)
+def _load_gamma_data() -> Dict[str, Any]:
+    """
+    Load the gamma transitions table, stored as a struct of contiguous arrays (one entry per gamma
+    line), together with the derived search indices. The table is loaded only once per process.
+    """
+    table = _load_table(
+        gamma_datafile_path,
+        np.dtype([
+            ("energy", np.float64),
+            ("intensity", np.float64),
+            ("decay_mode", "U64"),
+            ("halflife", np.float64),
+            ("nuclide", "U64"),
+            ("notes", "U64"),
+        ]),
+    )
+
+    data = {
+        "GAMMA_ENERGY": np.ascontiguousarray(table["energy"]),
+        "GAMMA_INTENSITY": np.ascontiguousarray(table["intensity"]),
+        "GAMMA_DECAY_MODE": np.ascontiguousarray(table["decay_mode"]),
+        "GAMMA_HALFLIFE": np.ascontiguousarray(table["halflife"]),
+        "GAMMA_NUCLIDE": np.ascontiguousarray(table["nuclide"]),
+        "GAMMA_NOTES": np.ascontiguousarray(table["notes"]),
+    }
+
+    # Energy-sorted view of the gamma table used for binary searches on the transition energy
+    data["GAMMA_ENERGY_ORDER"] = np.argsort(data["GAMMA_ENERGY"], kind="stable")
+    data["GAMMA_ENERGY_SORTED"] = data["GAMMA_ENERGY"][data["GAMMA_ENERGY_ORDER"]]
+
+    # Row indices of the gamma lines associated to each nuclide
+    data["NUCLIDE_INDEX"] = _build_index(data["GAMMA_NUCLIDE"])
+
+    return data
+
+
+@lru_cache(maxsize=None)
+def _load_x_ray_data() -> Dict[str, Any]:
+    """
+    Load the characteristic X-ray lines table, stored as a struct of contiguous arrays (one entry per
+    X-ray line), together with the derived search indices. The table is loaded only once per process.
+    """
+    table = _load_table(
+        x_ray_datafile_path,
+        np.dtype([
+            ("energy", np.float64),
+            ("element", "U64"),
+            ("shell", "U64"),
+        ]),
+    )
+
+    data = {
+        "X_RAY_ENERGY": np.ascontiguousarray(table["energy"]),
+        "X_RAY_ELEMENT": np.ascontiguousarray(table["element"]),
+        "X_RAY_SHELL": np.ascontiguousarray(table["shell"]),
+    }
+
+    # Energy-sorted view of the X-ray table used for binary searches on the transition energy
+    data["X_RAY_ENERGY_ORDER"] = np.argsort(data["X_RAY_ENERGY"], kind="stable")
+    data["X_RAY_ENERGY_SORTED"] = data["X_RAY_ENERGY"][data["X_RAY_ENERGY_ORDER"]]
+
+    # Row indices of the X-ray lines associated to each element
+    data["ELEMENT_INDEX"] = _build_index(data["X_RAY_ELEMENT"])
+
+    return data
+
+
+def __getattr__(name: str):
+    """
+    Lazily load the data tables on first access to any of the module-level data attributes
+    (e.g. `GAMMA_ENERGY`, `NUCLIDE_INDEX` or `X_RAY_ENERGY`). The legacy list-of-lists views of
+    the tables (`DEFAULT_GAMMA_DATA` and `DEFAULT_X_RAY_DATA`) are built from the arrays on
+    first access. Every value is stored in the module namespace so that the work is carried out
+    only once.
+
+    The legacy views are read-only compatibility copies: the search functions of the `nuclear`
+    module operate on the arrays, so modifying or replacing `DEFAULT_GAMMA_DATA` or
+    `DEFAULT_X_RAY_DATA` has no effect on their results.
+    """
+    if name == "DEFAULT_GAMMA_DATA":
+        data = _load_gamma_data()
+        value = [
+            list(row)
+            for row in zip(
+                data["GAMMA_ENERGY"].tolist(),
+                data["GAMMA_INTENSITY"].tolist(),
+                data["GAMMA_DECAY_MODE"].tolist(),
+                data["GAMMA_HALFLIFE"].tolist(),
+                data["GAMMA_NUCLIDE"].tolist(),
+                data["GAMMA_NOTES"].tolist(),
+            )
+        ]
+
+    elif name == "DEFAULT_X_RAY_DATA":
+        data = _load_x_ray_data()
+        value = [
+            list(row)
+            for row in zip(
+                data["X_RAY_ENERGY"].tolist(),
+                data["X_RAY_ELEMENT"].tolist(),
+                data["X_RAY_SHELL"].tolist(),
+            )
+        ]
+
+    elif name.startswith("GAMMA_") or name == "NUCLIDE_INDEX":
+        try:
+            value = _load_gamma_data()[name]
+        except KeyError:
+            raise AttributeError(f"module '{__name__}' has no attribute '{name}'") from None
+
+    elif name.startswith("X_RAY_") or name == "ELEMENT_INDEX":
+        try:
+            value = _load_x_ray_data()[name]
+        except KeyError:
+            raise AttributeError(f"module '{__name__}' has no attribute '{name}'") from None
+
+    else:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
-            sline = line.strip("\n").split(", ")
-            data = [float(x) if i == 0 else x for i, x in enumerate(sline)]
-            DEFAULT_X_RAY_DATA.append(data)
\ No newline at end of file
+    globals()[name] = value
+    return value
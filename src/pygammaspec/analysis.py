@@ -2,16 +2,15 @@ from __future__ import annotations
 
 import numpy as np
 
-from typing import Dict, Tuple, Optional, List
-from scipy.signal import find_peaks
-from scipy.optimize import curve_fit
+from typing import List, Tuple, Optional
+from numpy.polynomial.polynomial import polyval, polyvander
 
 from pygammaspec.spectrum import GammaSpectrum
 
 
 def peak_search(
     spectrum: GammaSpectrum, prominence: float = 0.01
-) -> Dict[int, Tuple[float, float, Optional[float]]]:
+) -> List[Tuple[float, float, Optional[float]]]:
     """
     Function running the `scipy.signal.find_peaks` funciton to detect peaks in the gamma spectrum.
 
@@ -24,24 +23,24 @@ def peak_search(
 
     Returns
     -------
-    Dict[int, Tuple[float, float, Optional[float]]]
-        The dictionary containing the index of the peak as the key and the tuple containing the channel, intensity
-        energy (in keV) as the value. If the spectrum is not calibrated the energy field will be filled with `None`.
+    List[Tuple[float, float, Optional[float]]]
+        The list, ordered by channel, containing for each peak the tuple of channel, intensity and energy (in keV).
+        If the spectrum is not calibrated the energy field will be filled with `None`.
     """
+    # Imported here since `scipy.signal` is heavy and itself pulls in `scipy.optimize`
+    from scipy.signal import find_peaks
+
     idx_list = find_peaks(spectrum.counts, prominence=prominence)[0]
 
-    peak_dict = {}
-    for i, idx in enumerate(idx_list):
-        channel = spectrum.channels[idx]
-        counts = spectrum.counts[idx]
-        energy = (
-            spectrum.calibration.get_energy(channel)
-            if spectrum.calibration is not None
-            else None
-        )
-        peak_dict[i] = (channel, counts, energy)
+    channels = spectrum.channels[idx_list]
+    counts = spectrum.counts[idx_list]
+    energies = (
+        spectrum.calibration.get_energy(channels).tolist()
+        if spectrum.calibration is not None
+        else [None] * len(idx_list)
+    )
 
-    return peak_dict
+    return list(zip(channels.tolist(), counts.tolist(), energies))
 
 
 def unitary_height_gaussian(x: float, x0: float, sigma: float) -> float:
@@ -65,13 +64,83 @@ def unitary_height_gaussian(x: float, x0: float, sigma: float) -> float:
     return np.exp(-((x - x0) ** 2) / (2 * sigma**2))
 
 
+def _peak_model(
+    x: np.ndarray, c0: float, x0: float, sigma: float, coefficients: np.ndarray
+) -> np.ndarray:
+    """
+    Gaussian peak of height `c0`, center `x0` and standard deviation `sigma` summed to a polynomial
+    baseline. The baseline polynomial is evaluated, using the Horner scheme, over the whole `x` array
+    at once.
+
+    Arguments
+    ---------
+    x: np.ndarray
+        The points in which the function must be evaluated.
+    c0: float
+        The height of the Gaussian function.
+    x0: float
+        The center of the Gaussian function.
+    sigma: float
+        The standard deviation of the Gaussian.
+    coefficients: np.ndarray
+        The coefficients of the baseline polynomial listed in ascending order.
+
+    Returns
+    -------
+    np.ndarray
+        The value of the function in each point of `x`.
+    """
+    return c0 * unitary_height_gaussian(x, x0, sigma) + polyval(x, coefficients)
+
+
+def _peak_model_jacobian(
+    x: np.ndarray, c0: float, x0: float, sigma: float, vander: np.ndarray
+) -> np.ndarray:
+    """
+    Analytic Jacobian of the `_peak_model` function with respect to its parameters. Since the model is
+    linear in the baseline coefficients, the corresponding columns are given by the Vandermonde matrix
+    of `x` that, being independent of the parameters, is supplied by the caller.
+
+    Arguments
+    ---------
+    x: np.ndarray
+        The points in which the Jacobian must be evaluated.
+    c0: float
+        The height of the Gaussian function.
+    x0: float
+        The center of the Gaussian function.
+    sigma: float
+        The standard deviation of the Gaussian.
+    vander: np.ndarray
+        The Vandermonde matrix of `x` (as returned by `polyvander`) for the baseline polynomial.
+
+    Returns
+    -------
+    np.ndarray
+        The `(len(x), 3 + b + 1)` matrix of partial derivatives. The columns are ordered
+        as the parameters of the model: height, center, standard deviation and baseline coefficients,
+        `b` being the order of the baseline.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    gaussian = unitary_height_gaussian(x, x0, sigma)
+    delta = x - x0
+
+    jacobian = np.empty((x.size, 3 + vander.shape[1]), dtype=np.float64)
+    jacobian[:, 0] = gaussian
+    jacobian[:, 1] = c0 * gaussian * delta / sigma**2
+    jacobian[:, 2] = c0 * gaussian * delta**2 / sigma**3
+    jacobian[:, 3:] = vander
+
+    return jacobian
+
+
 def fit_peak(
     spectrum: GammaSpectrum,
     emin: float,
     emax: float,
     baseline_order: int = 1,
     maxfev: int = 1000000,
-) -> Tuple[List[float], List[float], List[float], List[float], float]:
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]:
     """
     The function perform a Gaussian fit of a single photopeak using a polynomial baseline of variable order.
 
@@ -95,39 +164,45 @@ def fit_peak(
 
     Returns
     -------
-    List[float]
+    np.ndarray
         The optimized fitting parameters. The array lists in order the height of the gaussian, its center and its standard
         deviation and it ends with the coefficients of the baseline polynomial listed in ascending order. The lenght of the
         list is `3 + b + 1` where `b` is the `basline_order`.
 
-    List[float]
-        The list of energy datapoints used in the fitting.
-    List[float]
-        The list of counts associated with the fitted function.
-    List[float]
-        The list of counts associated with the baseline function.
+    np.ndarray
+        The array of energy datapoints used in the fitting.
+    np.ndarray
+        The array of counts associated with the fitted function.
+    np.ndarray
+        The array of counts associated with the baseline function.
     float
         The estimated efficiency for the peak as 100*FWHM(E)/E.
     """
     if spectrum.calibration is None:
         raise RuntimeError("Cannot use fit_peak on uncalibrated spectra.")
 
-    def baseline(x, *args):
-        value = 0
-        for n, cn in enumerate(args):
-            value += cn * (x**n)
-        return value
+    # Imported here to avoid loading `scipy.optimize` when fitting is not required
+    from scipy.optimize import curve_fit
+
+    energy = np.asarray(spectrum.energy, dtype=np.float64)
+    counts = np.asarray(spectrum.counts, dtype=np.float64)
+
+    mask = (energy >= emin) & (energy <= emax)
+    xarr, yarr = energy[mask], counts[mask]
+
+    # The fitted points do not change during the optimization: the baseline Vandermonde matrix is
+    # computed once so that the model and its Jacobian, specialized on the selected `baseline_order`,
+    # only require a matrix-vector product to evaluate the baseline. Both functions are therefore valid
+    # only on `xarr` (the grid passed by `curve_fit`) and must not be evaluated on any other grid.
+    vander = polyvander(xarr, baseline_order)
 
     def fit_function(x, c0, x0, sigma, *args):
-        value = c0 * unitary_height_gaussian(x, x0, sigma)
-        value += baseline(x, *args)
-        return value
+        assert x.shape[0] == vander.shape[0], "fit_function must be evaluated on the fitted points"
+        return c0 * unitary_height_gaussian(x, x0, sigma) + vander.dot(args)
 
-    xlist, ylist = [], []
-    for energy, counts in zip(spectrum.energy, spectrum.counts):
-        if energy >= emin and energy <= emax:
-            xlist.append(energy)
-            ylist.append(counts)
+    def fit_jacobian(x, c0, x0, sigma, *args):
+        assert x.shape[0] == vander.shape[0], "fit_jacobian must be evaluated on the fitted points"
+        return _peak_model_jacobian(x, c0, x0, sigma, vander)
 
     guess = [0, 0.5 * (emax + emin), 0.1 * (emax - emin)]
     for _ in range(baseline_order + 1):
@@ -135,19 +210,21 @@ def fit_peak(
 
     popt, pcov, infodict, mesg, ier = curve_fit(
         fit_function,
-        xlist,
-        ylist,
+        xarr,
+        yarr,
         p0=guess,
+        jac=fit_jacobian,
         maxfev=maxfev,
         full_output=True,
     )
 
-    yfit, ybaseline = [], []
-    for x in xlist:
-        yfit.append(fit_function(x, *popt))
-        ybaseline.append(baseline(x, *popt[3::]))
+    c0, x0, sigma = popt[:3]
+    coefficients = np.ascontiguousarray(popt[3:], dtype=np.float64)
+
+    yfit = _peak_model(xarr, c0, x0, sigma, coefficients)
+    ybaseline = polyval(xarr, coefficients)
 
-    fwhm = 2 * popt[2] * np.sqrt(2 * np.log(2))
-    efficiency = 100 * fwhm / popt[1]
+    fwhm = 2 * sigma * np.sqrt(2 * np.log(2))
+    efficiency = 100 * fwhm / x0
 
-    return popt, xlist, yfit, ybaseline, efficiency
+    return popt, xarr, yfit, ybaseline, efficiency
@@ -1,8 +1,8 @@
 import pygammaspec
-import radioactivedecay as rd
+import numpy as np
 
 from typing import Optional, List, Union, Tuple
-from copy import deepcopy
+from functools import lru_cache
 
 
 def search_gamma_line(
@@ -33,22 +33,27 @@ def search_gamma_line(
         A list of lists containing in order the energy, relative intensity, decay mode, isotope
         and notes about the gamma line responding to the search parameters
     """
-    results = []
-
-    for data in pygammaspec.DEFAULT_GAMMA_DATA:
-
-        if data[0] < energy - delta or data[0] > energy + delta:
-            continue
-
-        if halflife_threshold and halflife_threshold > data[3]:
-            continue
-
-        if intensity_threshold and intensity_threshold > data[1]:
-            continue
-
-        results.append(data)
-
-    return results
+    lo = np.searchsorted(pygammaspec.GAMMA_ENERGY_SORTED, energy - delta, side="left")
+    hi = np.searchsorted(pygammaspec.GAMMA_ENERGY_SORTED, energy + delta, side="right")
+    idx = np.sort(pygammaspec.GAMMA_ENERGY_ORDER[lo:hi])
+
+    if halflife_threshold:
+        idx = idx[pygammaspec.GAMMA_HALFLIFE[idx] >= halflife_threshold]
+
+    if intensity_threshold:
+        idx = idx[pygammaspec.GAMMA_INTENSITY[idx] >= intensity_threshold]
+
+    return [
+        list(data)
+        for data in zip(
+            pygammaspec.GAMMA_ENERGY[idx].tolist(),
+            pygammaspec.GAMMA_INTENSITY[idx].tolist(),
+            pygammaspec.GAMMA_DECAY_MODE[idx].tolist(),
+            pygammaspec.GAMMA_HALFLIFE[idx].tolist(),
+            pygammaspec.GAMMA_NUCLIDE[idx].tolist(),
+            pygammaspec.GAMMA_NOTES[idx].tolist(),
+        )
+    ]
 
 
 def search_x_ray_line(
@@ -71,16 +76,66 @@ def search_x_ray_line(
         A list of lists containing in order the energy, element and shell of the
         X-ray responding to the search parameters
     """
-    results = []
+    lo = np.searchsorted(pygammaspec.X_RAY_ENERGY_SORTED, energy - delta, side="left")
+    hi = np.searchsorted(pygammaspec.X_RAY_ENERGY_SORTED, energy + delta, side="right")
+    idx = np.sort(pygammaspec.X_RAY_ENERGY_ORDER[lo:hi])
+
+    return [
+        list(data)
+        for data in zip(
+            pygammaspec.X_RAY_ENERGY[idx].tolist(),
+            pygammaspec.X_RAY_ELEMENT[idx].tolist(),
+            pygammaspec.X_RAY_SHELL[idx].tolist(),
+        )
+    ]
+
+
+def _gather_gamma_lines(
+    nuclides: List[str],
+    limit_intensity: bool = False,
+    intensity_threshold: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Collect, in a single vectorized pass, the gamma lines associated to a list of nuclides applying
+    the intensity filters of `nuclide_gamma_lines` separately to each nuclide.
 
-    for data in pygammaspec.DEFAULT_X_RAY_DATA:
+    Arguments
+    ---------
+    nuclides: List[str]
+        The list of nuclide names
+    limit_intensity: bool
+        If set to true will return only the transitions with relative intensity greater than 10% of the
+        highest one of the same nuclide.
+    intensity_threshold: Optional[float]
+        If set to a value different from `None` will discard all the energy lines of relative intensity
+        lower than the threshold. If limit_intensity is set to `True` this keyword will be ignored.
 
-        if data[0] < energy - delta or data[0] > energy + delta:
-            continue
+    Returns
+    -------
+    np.ndarray
+        The position, in the `nuclides` list, of the nuclide emitting each selected gamma line.
+    np.ndarray
+        The row indices of the selected gamma lines in the gamma data table.
+    """
+    empty = np.empty(0, dtype=np.intp)
+    groups = [pygammaspec.NUCLIDE_INDEX.get(nuclide, empty) for nuclide in nuclides]
+
+    idx = np.concatenate(groups) if groups else empty
+    owner = np.repeat(np.arange(len(groups)), [group.size for group in groups])
+    intensity = pygammaspec.GAMMA_INTENSITY[idx]
 
-        results.append(data)
+    if limit_intensity is True:
+        max_intensity = np.full(len(groups), -np.inf)
+        np.maximum.at(max_intensity, owner, intensity)
+        mask = intensity > 0.1 * max_intensity[owner]
+
+    elif limit_intensity is False and intensity_threshold:
+        mask = intensity >= intensity_threshold
+
+    else:
+        return owner, idx
 
-    return results
+    return owner[mask], idx[mask]
 
 
 def nuclide_gamma_lines(
@@ -110,33 +165,12 @@ def nuclide_gamma_lines(
         The list of relative intensities (in %)
     """
 
-    gamma_energy, relative_intensity = [], []
+    _, idx = _gather_gamma_lines([nuclide], limit_intensity, intensity_threshold)
 
-    for data in pygammaspec.DEFAULT_GAMMA_DATA:
-
-        if data[4] == nuclide:
-
-            if limit_intensity is False:
-                if intensity_threshold and intensity_threshold > data[1]:
-                    continue
-
-            gamma_energy.append(data[0])
-            relative_intensity.append(data[1])
-
-    if limit_intensity is True and gamma_energy != []:
-
-        max_intensity = max(relative_intensity)
-        new_gamma_energy, new_relative_intensity = [], []
-
-        for energy, intensity in zip(gamma_energy, relative_intensity):
-            if intensity > 0.1 * max_intensity:
-                new_gamma_energy.append(energy)
-                new_relative_intensity.append(intensity)
-
-        return new_gamma_energy, new_relative_intensity
-
-    else:
-        return gamma_energy, relative_intensity
+    return (
+        pygammaspec.GAMMA_ENERGY[idx].tolist(),
+        pygammaspec.GAMMA_INTENSITY[idx].tolist(),
+    )
 
 
 def element_x_ray_lines(
@@ -157,16 +191,34 @@ def element_x_ray_lines(
     List[str]
         The type of shell transition associated to the characteristic X-ray emission 
     """
-    x_ray_energy, shell = [], []
+    idx = pygammaspec.ELEMENT_INDEX.get(element, np.empty(0, dtype=np.intp))
+
+    return pygammaspec.X_RAY_ENERGY[idx].tolist(), pygammaspec.X_RAY_SHELL[idx].tolist()
+
 
-    for data in pygammaspec.DEFAULT_X_RAY_DATA:
+@lru_cache(maxsize=None)
+def _progeny(nuclide: str) -> Tuple[Tuple[str, ...], Tuple[float, ...]]:
+    """
+    Returns the direct progeny of a nuclide together with the corresponding branching fractions.
+    The results are cached to avoid building the same `radioactivedecay.Nuclide` object multiple times.
 
-        if data[1] == element:
+    Arguments
+    ---------
+    nuclide: str
+        The name of the nuclide (e.g. Ra-226)
 
-            x_ray_energy.append(data[0])
-            shell.append(data[2])
+    Returns
+    -------
+    Tuple[str, ...]
+        The names of the direct decay products.
+    Tuple[float, ...]
+        The branching fraction associated to each decay product.
+    """
+    # Imported here to avoid loading `radioactivedecay` when decay chains are not required
+    import radioactivedecay as rd
 
-    return x_ray_energy, shell
+    data = rd.Nuclide(nuclide)
+    return tuple(data.progeny()), tuple(data.branching_fractions())
 
 
 def decay_products(
@@ -189,20 +241,17 @@ def decay_products(
         The list of nuclides produced by the decay chain
     """
 
-    daughters = [father]
+    # Dictionaries are used as insertion-ordered sets to keep the order of discovery
+    daughters = {father: None}
     current = [father]
 
     while True:
 
-        new = []
+        new = {}
 
         for nuclide_name in current:
 
-            nuclide = rd.Nuclide(nuclide_name)
-
-            for daughter, branch_ratio in zip(
-                nuclide.progeny(), nuclide.branching_fractions()
-            ):
+            for daughter, branch_ratio in zip(*_progeny(nuclide_name)):
 
                 if (
                     branching_ratio_threshold
@@ -210,18 +259,15 @@ def decay_products(
                 ):
                     continue
 
-                if daughter not in new:
-                    new.append(daughter)
-
-                if daughter not in daughters:
-                    daughters.append(daughter)
+                new[daughter] = None
+                daughters[daughter] = None
 
-        if new == []:
+        if new == {}:
             break
 
-        current = deepcopy(new)
+        current = new
 
-    return daughters
+    return list(daughters)
 
 
 def decay_products_spectrum(
@@ -253,22 +299,17 @@ def decay_products_spectrum(
     List[float]
         The energy of each gamma line in keV.
     """
-    emitters, energies = [], []
-
     nuclides = decay_products(
         father, branching_ratio_threshold=branching_ratio_threshold
     )
 
-    for nuclide in nuclides:
-
-        lines, _ = nuclide_gamma_lines(
-            nuclide,
-            limit_intensity=limit_intensity,
-            intensity_threshold=intensity_threshold,
-        )
+    owner, idx = _gather_gamma_lines(
+        nuclides,
+        limit_intensity=limit_intensity,
+        intensity_threshold=intensity_threshold,
+    )
 
-        for energy in lines:
-            emitters.append(nuclide)
-            energies.append(energy)
+    emitters = [nuclides[i] for i in owner.tolist()]
+    energies = pygammaspec.GAMMA_ENERGY[idx].tolist()
 
     return emitters, energies
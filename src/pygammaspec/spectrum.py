@@ -3,8 +3,33 @@ from __future__ import annotations
 import os, warnings
 import numpy as np
 
-from copy import deepcopy
-from typing import List, Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, Union
+
+
+def _moving_average(counts: np.ndarray, width: int) -> np.ndarray:
+    """
+    Compute the centered moving average of `counts` over windows of `2*width + 1` points. Only the
+    windows fully contained in the data are kept, so that the output has `2*width` fewer points.
+    The running sum of `scipy.ndimage.uniform_filter1d` is used so that the cost does not depend on
+    the window size. Unlike summing each window independently, the running sum carries round-off
+    along the spectrum (relative errors of the order of 1e-8 on low-count regions following high-count
+    ones), which is well below the statistical uncertainty of the counts.
+
+    Arguments
+    ---------
+    counts: np.ndarray
+        The array of values to be averaged.
+    width: int
+        The excursion of the averaging windows.
+
+    Returns
+    -------
+    np.ndarray
+        The array of averaged values.
+    """
+    from scipy.ndimage import uniform_filter1d
+
+    return uniform_filter1d(counts, size=2*width + 1, mode="nearest")[width:len(counts)-width]
 
 
 class GammaSpectrum:
@@ -21,21 +46,22 @@ class GammaSpectrum:
         The calibration object using to correlate channel indices to energy values (in keV)
     acquisition_time: Optional[float]
         The acquisition time (in seconds) used for the measurement.
-    channels: List[float]
-        The list of channel indeces
-    energies: List[float]
-        The list of gamma photon energies associated to each channel (in keV)
-    counts: List[float]
-        The list of counts for each channel in counts per second (cps)
+    channels: np.ndarray
+        The array of channel indeces
+    energies: np.ndarray
+        The array of gamma photon energies associated to each channel (in keV)
+    counts: np.ndarray
+        The array of counts for each channel in counts per second (cps)
     total_activity: float
         The total activity in counts per second (cps) recoded by the detector
     """
 
     def __init__(self) -> None:
         self.__acquisition_time: Optional[float] = None
-        self.__channels: List[float] = []
-        self.__counts: List[float] = []
+        self.__channels: np.ndarray = np.empty(0, dtype=np.float64)
+        self.__counts: np.ndarray = np.empty(0, dtype=np.float64)
         self.__calibration: Optional[Calibration] = None
+        self.__energy_cache: Optional[np.ndarray] = None
     
     @property
     def calibration(self) -> Calibration:
@@ -51,21 +77,23 @@ class GammaSpectrum:
 
     @calibration.setter
     def calibration(self, calibration: Calibration) -> None:
-        if type(calibration) != Calibration:
+        if not isinstance(calibration, Calibration):
             raise TypeError("The calibration property must be of type Calibration")
         self.__calibration = calibration
+        self.__energy_cache = None
     
     @calibration.deleter
     def calibration(self) -> None:
         self.__calibration = None
+        self.__energy_cache = None
     
-    def __setup_operation(self, other: GammaSpectrum) -> Tuple[GammaSpectrum, List[float], List[float]]:
+    def __setup_operation(self, other: GammaSpectrum) -> Tuple[GammaSpectrum, np.ndarray, np.ndarray]:
         """
         Validate and setup a binary operation between spectrum objects. The function
         checks if the existing channel labels are compatible within the limit imposed by the shortest
         spectrum. When the operation is carried out between spectra of different length, the shortest spectrum
         is augmented by adding the missing channels with zero counts associated. If compatible the function
-        returns a partially initialized GammaSpectrum object together with the augmented counts lists.
+        returns a partially initialized GammaSpectrum object together with the augmented counts arrays.
 
         Raises
         ------
@@ -76,14 +104,18 @@ class GammaSpectrum:
         -------
         GammaSpectrum
             The partially initialized object containing the list of channels. The acquisition time is set to None.
-        List[float]
-            The list encoding the number of counts for the left object in the operation.
-        List[float]
-            The list encoding the number of counts for the right object in the operation.
+        np.ndarray
+            The array encoding the number of counts for the left object in the operation (always a new array).
+        np.ndarray
+            The array encoding the number of counts for the right object in the operation (read-only).
         """
 
+        # Channel labels are non-integer pulse heights (e.g. 0.01 steps in PRA histograms), so a relative tolerance
+        # is needed. Spectra usually share identical labels: check the cheaper exact equality first and resort to the
+        # tolerance check only when it fails.
         limit = min(len(self.__channels), len(other.__channels))
-        if not np.allclose(self.__channels[0:limit], other.__channels[0:limit], rtol=1e-5):
+        left, right = self.__channels[:limit], other.__channels[:limit]
+        if not (np.array_equal(left, right) or np.allclose(left, right, rtol=1e-5)):
             raise RuntimeError("Cannot perform operation on two spectra characterized by different channels labels")
 
         obj = GammaSpectrum()
@@ -94,29 +126,42 @@ class GammaSpectrum:
         else:
             obj.__calibration = self.__calibration
         
-        left_counts = deepcopy(self.__counts)
-        right_counts = deepcopy(other.__counts)
-        
-        if len(self.__channels) > len(other.__channels):
-            obj.__channels = self.__channels
-            for _ in self.__channels[limit::]:
-                right_counts.append(0)
+        size = max(len(self.__channels), len(other.__channels))
+        obj.__channels = self.__channels if len(self.__channels) == size else other.__channels
+
+        # The left counts are always copied into a new array that can host the result of the operation, while the
+        # right counts are only read and need to be copied only when padding is required
+        left_counts = np.zeros(size, dtype=np.float64)
+        left_counts[:len(self.__counts)] = self.__counts
+
+        if len(other.__counts) == size:
+            right_counts = other.__counts
         else:
-            obj.__channels = other.__channels
-            for _ in other.__channels[limit::]:
-                left_counts.append(0)
+            right_counts = np.zeros(size, dtype=np.float64)
+            right_counts[:len(other.__counts)] = other.__counts
         
         return obj, left_counts, right_counts
     
-    def __add__(self, other: GammaSpectrum) -> GammaSpectrum:
+    def __binary_operation(self, other: GammaSpectrum, operator: np.ufunc) -> GammaSpectrum:
+        """
+        Carry out a binary operation between spectrum objects applying the given NumPy ufunc
+        to the counts. The result is written in place into the left counts array returned by
+        `__setup_operation`, which is private to the operation, avoiding further allocations.
+
+        Returns
+        -------
+        GammaSpectrum
+            The spectrum resulting from the operation.
+        """
         obj, left, right = self.__setup_operation(other)
-        obj.__counts = [x + y for x, y in zip(left, right)]
+        obj.__counts = operator(left, right, out=left)
         return obj
     
+    def __add__(self, other: GammaSpectrum) -> GammaSpectrum:
+        return self.__binary_operation(other, np.add)
+    
     def __sub__(self, other: GammaSpectrum) -> GammaSpectrum:
-        obj, left, right = self.__setup_operation(other)
-        obj.__counts = [x - y for x, y in zip(left, right)]
-        return obj
+        return self.__binary_operation(other, np.subtract)
     
     @classmethod
     def from_PRA_histogram(self, path: str, acqisition_time: float) -> GammaSpectrum:
@@ -149,16 +194,12 @@ class GammaSpectrum:
 
         obj = GammaSpectrum()
         obj.__acquisition_time = acqisition_time
-        obj.__counts = []
-        
-        with open(path, 'r') as file:
-            
-            _ = file.readline()
 
-            for line in file:
-                sline = line.split()
-                obj.__channels.append(float(sline[0]))
-                obj.__counts.append(float(sline[1])/acqisition_time)
+        data = np.loadtxt(path, skiprows=1, usecols=(0, 1), dtype=np.float64, ndmin=2)
+
+        # Columns of the parsed table are strided views: store them as contiguous arrays
+        obj.__channels = np.ascontiguousarray(data[:, 0])
+        obj.__counts = data[:, 1] / acqisition_time
         
         return obj
 
@@ -178,22 +219,23 @@ class GammaSpectrum:
         return self.__acquisition_time
     
     @property
-    def channels(self) -> List[float]:
+    def channels(self) -> np.ndarray:
         """
-        The list of acquisition channels.
+        The array of acquisition channels.
 
         Returns
         -------
-        List[float]
-            The list of channels.
+        np.ndarray
+            The array of channels.
         """
         return self.__channels
     
     @property
-    def energy(self) -> List[float]:
+    def energy(self) -> np.ndarray:
         """
-        The list of energy values (in keV) associated to each acquisition channel. Requires the definition of
-        an energy calibration object.
+        The array of energy values (in keV) associated to each acquisition channel. Requires the definition of
+        an energy calibration object. The energies are computed on first access and cached until the calibration
+        is changed. The returned array is read-only: use `np.copy` to obtain a modifiable version.
         
         Raises
         ------
@@ -202,22 +244,26 @@ class GammaSpectrum:
 
         Returns
         -------
-        List[float]
-            The list of energy values (in keV) associated to each datapoint.
+        np.ndarray
+            The array of energy values (in keV) associated to each datapoint.
         """
         if self.__calibration is None:
             raise RuntimeError("Cannot access the `energy` property when calibration has not been set.")
 
-        return [self.__calibration.get_energy(channel) for channel in self.__channels]
+        if self.__energy_cache is None:
+            self.__energy_cache = self.__calibration.get_energy(self.__channels)
+            self.__energy_cache.flags.writeable = False
+
+        return self.__energy_cache
     
     @property
-    def counts(self) -> List[float]:
+    def counts(self) -> np.ndarray:
         """
         The activity in counts per second for each channel.
 
         Returns
         -------
-        List[float]
+        np.ndarray
             The conting rate for each channel.
         """
         return self.__counts
@@ -232,7 +278,7 @@ class GammaSpectrum:
         float
             The total activity of the sample, as pulse per second, recorded over all channels.
         """
-        return sum(self.__counts)
+        return float(self.__counts.sum())
 
     def average_smoothing(self, width: int) -> GammaSpectrum:
         """
@@ -243,6 +289,11 @@ class GammaSpectrum:
         width: int
             The excursion of the averaging windows (the total number of points is `2*width + 1`)
 
+        Raises
+        ------
+        ValueError
+            Exception raised if the width is not positive or if the averaging window is larger than the spectrum.
+
         Returns
         -------
         GammaSpectrum
@@ -251,29 +302,17 @@ class GammaSpectrum:
         if width<=0:
             raise ValueError("The average window width must be a positive integer")
         
+        size = 2*width + 1
+        if len(self.__counts) < size:
+            raise ValueError("The average window cannot be larger than the spectrum")
+        
         obj = GammaSpectrum()
         obj.__acquisition_time = None
         obj.__calibration = self.__calibration
 
         obj.__channels = self.__channels[width:-width]
 
-        current = 0
-        for i in range(len(obj.__channels)):
-            
-            if i==0:
-                current = sum([x for x in self.__counts[0:2*width+1]])
-            else:
-                current += self.__counts[2*width+i] - self.__counts[i-1]
-            
-            obj.__counts.append(current/(2*width+1))
-
-        #obj.__channels, obj.__histogram = [], []
-        # for i, channel in enumerate(self.__channels[width:-width]):
-        #     avg = self.scaled_histogram[i+width]
-        #     for j in range(width):
-        #         avg += self.scaled_histogram[i+width+j+1] + self.scaled_histogram[i+width-j-1]
-        #     obj.__channels.append(channel)
-        #     obj.__histogram.append(avg/(2.*width+1))
+        obj.__counts = _moving_average(self.__counts, width)
         
         return obj
 
@@ -292,34 +331,33 @@ class Calibration:
     """
 
     def __init__(self, calibration_data: Dict[float, float], order: int = 1) -> None:
-        self.__channels, self.__energies = [], []
+        data = np.array(list(calibration_data.items()), dtype=np.float64).reshape(-1, 2)
+        self.__channels = np.ascontiguousarray(data[:, 0])
+        self.__energies = np.ascontiguousarray(data[:, 1])
 
-        for channel, energy in calibration_data.items():
-            self.__channels.append(channel)
-            self.__energies.append(energy)
+        self.__fit(order)
+    
+    def __fit(self, order: int) -> None:
+        """
+        Fit the calibration points with a polynomial of the given order.
 
+        Arguments
+        ---------
+        order: int
+            The order of the fitting polynomial
+        """
         self.__coefficients = np.polyfit(self.__channels, self.__energies, deg=order)
+        self.__order = len(self.__coefficients) - 1
     
     def __eq__(self, other: Calibration) -> bool:
-        if type(other) != Calibration:
-            return False
-        
-        if len(self.__channels) != len(other.__channels) or len(self.__energies) != len(other.__energies):
-            return False
-        
-        if any([a!=b for a, b in zip(self.__channels, other.__channels)]):
-            return False
-        
-        if any([a!=b for a, b in zip(self.__energies, other.__energies)]):
-            return False
-        
-        if len(self.__coefficients) != len(other.__coefficients):
-            return False
-        
-        if any([a!=b for a, b in zip(self.__coefficients, other.__coefficients)]):
-            return False
+        if not isinstance(other, Calibration):
+            return NotImplemented
         
-        return True
+        return (
+            np.array_equal(self.__channels, other.__channels)
+            and np.array_equal(self.__energies, other.__energies)
+            and np.array_equal(self.__coefficients, other.__coefficients)
+        )
     
     def save_calibration_file(self, path: str) -> None:
         """
@@ -341,6 +379,44 @@ class Calibration:
             for coefficient in self.__coefficients:
                 file.write(f"  {coefficient}\n")
     
+    @classmethod
+    def from_arrays(self, channels: np.ndarray, energies: np.ndarray, order: int = 1) -> Calibration:
+        """
+        Classmethod capable of generating an instance of the `Calibration` class directly from
+        the arrays of channels and energies, without going through a dictionary.
+
+        Arguments
+        ---------
+        channels: np.ndarray
+            The array (or list) of channels used for the calibration.
+        energies: np.ndarray
+            The array (or list) of energies (in keV) associated to each channel.
+        order: int
+            The order of the fitting polynomial (default: 1)
+        
+        Raises
+        ------
+        ValueError
+            Exception raised if the channels and energies are not one-dimensional sequences of the same length.
+
+        Returns
+        -------
+        Calibration
+            The fitted calibration object
+        """
+        channels = np.array(channels, dtype=np.float64)
+        energies = np.array(energies, dtype=np.float64)
+
+        if channels.ndim != 1 or channels.shape != energies.shape:
+            raise ValueError("The channels and energies must be one-dimensional sequences of the same length")
+
+        obj = Calibration.__new__(Calibration)
+        obj.__channels = channels
+        obj.__energies = energies
+        obj.__fit(order)
+
+        return obj
+    
     @classmethod
     def from_calibration_file(self, path: str) -> Calibration:
         """
@@ -360,49 +436,47 @@ class Calibration:
         with open(path, "r") as file:
             npt = int(file.readline().split(":")[-1].strip("\n"))
 
-            data = {}
-            for _ in range(npt):
-                line = file.readline().split()
-                data[float(line[0])] = float(line[1])
+            points = np.loadtxt(file, max_rows=npt, comments=None, dtype=np.float64, ndmin=2)
             
             order = int(file.readline().split(":")[-1].strip(")\n"))
-            
-            obj = Calibration(data, order)
 
-            coefficents = []
-            for _ in range(order+1):
-                coefficents.append(float(file.readline()))
-            
-            obj.__coefficients = coefficents
+            coefficients = np.loadtxt(file, max_rows=order+1, comments=None, dtype=np.float64, ndmin=1)
+
+        # The stored coefficients are used as they are, without fitting the calibration points again
+        obj = Calibration.__new__(Calibration)
+        obj.__channels = np.ascontiguousarray(points[:, 0])
+        obj.__energies = np.ascontiguousarray(points[:, 1])
+        obj.__coefficients = coefficients
+        obj.__order = len(coefficients) - 1
 
-            return obj
+        return obj
      
     @property
-    def channels(self) -> List[float]:
+    def channels(self) -> np.ndarray:
         """
-        The list of channels used for the calibration.
+        The array of channels used for the calibration.
 
         Returns
         -------
-        List[float]
-            The list of channels used for the calibration.                
+        np.ndarray
+            The array of channels used for the calibration.                
         """
         return self.__channels
     
     @property
-    def energies(self) -> List[float]:
+    def energies(self) -> np.ndarray:
         """
-        The list of energies (in keV) used for the calibration.
+        The array of energies (in keV) used for the calibration.
 
         Returns
         -------
-        List[float]
-            The list of energies (in keV) used for the calibration.                
+        np.ndarray
+            The array of energies (in keV) used for the calibration.                
         """
         return self.__energies
 
     @property
-    def order(self):
+    def order(self) -> int:
         """
         The order of the fitting polynomial
 
@@ -411,25 +485,24 @@ class Calibration:
         int
             The order of the fitting polynomial
         """
-        return len(self.__coefficients) - 1    
+        return self.__order
     
-    def get_energy(self, channel: float):
+    def get_energy(self, channel: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
         """
         Conversion function that, from the calibration data, converts the channel index
-        into energy value.
+        into energy value. The function also accepts an array of channels, in which case
+        the conversion is carried out on all the elements at once.
 
         Arguments
         ---------
-        channel: float
-            The index of the channel
+        channel: Union[float, np.ndarray]
+            The index of the channel (or the array of channel indices)
         
         Returns
         -------
-        float
-            The energy in keV corresponding to the selected channel
+        Union[float, np.ndarray]
+            The energy in keV corresponding to the selected channel (or the array of energies)
         """
-        energy = 0
-        for n, cn in enumerate(self.__coefficients):
-            energy += cn*(channel**(self.order-n))
-            
-        return energy
\ No newline at end of file
+        energy = np.polyval(self.__coefficients, channel)
+        return float(energy) if np.ndim(energy) == 0 else energy
+    
@@ -1,11 +1,15 @@
 import warnings
-import matplotlib.pyplot as plt
+import numpy as np
+from os.path import splitext
 from typing import Optional, Tuple
 
 from pygammaspec.spectrum import GammaSpectrum, Calibration
 from pygammaspec.analysis import peak_search
 from pygammaspec.nuclear import decay_products_spectrum
 
+# File formats in which the figure is saved as vector graphics (rasterized artists use the `dpi` resolution)
+_VECTOR_FORMATS = (".pdf", ".svg", ".svgz", ".eps", ".ps")
+
 
 def plot_spectrum(
     sample: GammaSpectrum,
@@ -21,6 +25,8 @@ def plot_spectrum(
     external_calibration: Optional[Calibration] = None,
     nuclide: Optional[str] = None,
     branching_ratio_threshold: float = 0.05,
+    dpi: Optional[int] = None,
+    rasterize: bool = False,
 ):
     """
     The function plots the gamma spectrum of the sample. If a background spetrum is given, the function automatically
@@ -47,7 +53,8 @@ def plot_spectrum(
         The tuple of float values setting the bottom and top of the y-scale. If set to `None` (default)
         will apply automatic scaling of the y-axis.
     smoothing_size: int
-        Size of the averaging window used to smooth out the difference spectrum (default: 10)
+        Size of the averaging window used to smooth out the difference spectrum (default: 10). If set
+        to zero, the smoothing is skipped and only the raw difference spectrum is shown.
     prominence: Optional[float]
         If set to a value different from `None` (default), will automatically apply the `peak_search` function
         from the `pygammaspec.analysis` to mark the main peaks using the user defined prominence value.
@@ -62,12 +69,27 @@ def plot_spectrum(
         in the case of calibrated spectra.
     branching_ratio_threshold: float
         The brancing ratio threshold used to search for decay products of the target nuclide. (default 0.05)
+    dpi: Optional[int]
+        The resolution, in dots per inch, of the image file saved when `filename` is given. If set to `None`
+        (default), 600 dpi are used for vector formats (PDF, SVG, EPS and PS), so that rasterized traces stay
+        publication-grade, and 150 dpi for raster formats (e.g. PNG).
+    rasterize: bool
+        If set to `True`, the spectrum traces are rasterized when saving to vector formats (e.g. PDF or SVG), so that
+        they are embedded as a bitmap at the `dpi` resolution instead of as paths with one vertex per channel. This
+        reduces the size and the rendering time of files containing long spectra. Axes, labels and markers are
+        always saved as vector graphics. Has no effect on raster formats such as PNG (default: `False`).
 
     Raises
     ------
     RuntimeError
         Exception raised if the x-axis range is specified with `enrange` without a valid calibration.
+    ValueError
+        Exception raised if a background is given and `smoothing_size` is negative or the averaging window is
+        larger than the difference spectrum.
     """
+    # Imported here so that loading the module does not initialize the matplotlib backend
+    import matplotlib.pyplot as plt
+
     # If available, select the proper calibration object.
     calibration = None
     if external_calibration:
@@ -91,104 +113,116 @@ def plot_spectrum(
 
     # Define compact helper function to create the xaxis scale based on presence or absence of calibration
     def xscale(s: GammaSpectrum):
-        return [calibration.get_energy(c) if calibration else c for c in s.channels]
+        return calibration.get_energy(s.channels) if calibration else s.channels
 
     plt.rc("font", **{"size": 14})
 
+    # Draw long spectra in chunks to keep the Agg renderer fast on paths with many vertices
+    plt.rc("agg.path", chunksize=10000)
+
     if background:
         fig, (ax1, ax2) = plt.subplots(nrows=2, figsize=(12, 10))
     else:
         fig, ax1 = plt.subplots(figsize=(12, 5))
         ax1.set_xlabel("Energy (keV)" if calibration else "Channel", size=16)
 
-    ax1.plot(xscale(sample), sample.counts, c="black", label="Sample")
+    sample_x = xscale(sample)
+
+    ax1.plot(sample_x, sample.counts, c="black", label="Sample", rasterized=rasterize)
     ax1.set_ylabel("Activity (cps)", size=16)
     ax1.grid(which="major", c="#DDDDDD")
-    ax1.grid(which="minor", c="#EEEEEE")
+    # Minor ticks (and the corresponding grid) are only present on logarithmic axes
+    if xlog or ylog:
+        ax1.grid(which="minor", c="#EEEEEE")
 
     if background:
-        ax1.plot(xscale(background), background.counts, c="#00AAAA", label="Background")
+        background_x = xscale(background)
+
+        ax1.plot(
+            background_x,
+            background.counts,
+            c="#00AAAA",
+            label="Background",
+            rasterized=rasterize,
+        )
         ax1.legend()
 
         difference = sample - background
-        avg_difference = difference.average_smoothing(smoothing_size)
 
-        ax2.plot(xscale(difference), difference.counts, c="#AAAAAA")
-        ax2.plot(xscale(avg_difference), avg_difference.counts, c="black")
+        # The difference is defined over the channels of the longest spectrum: reuse the x-axis values
+        difference_x = sample_x if difference.channels is sample.channels else background_x
+
+        if smoothing_size == 0:
+            # No smoothing requested: only the raw difference is shown
+            ax2.plot(difference_x, difference.counts, c="black", rasterized=rasterize)
+
+        else:
+            avg_difference = difference.average_smoothing(smoothing_size)
+
+            # The smoothed difference is defined over the same channels trimmed by the averaging window
+            avg_difference_x = difference_x[smoothing_size:-smoothing_size]
+
+            ax2.plot(difference_x, difference.counts, c="#AAAAAA", rasterized=rasterize)
+            ax2.plot(avg_difference_x, avg_difference.counts, c="black", rasterized=rasterize)
 
         ax2.set_ylabel("Activity (cps)", size=16)
         ax2.set_xlabel("Energy (keV)" if calibration else "Channel", size=16)
 
         ax2.grid(which="major", c="#DDDDDD")
-        ax2.grid(which="minor", c="#EEEEEE")
+        # Minor ticks (and the corresponding grid) are only present on logarithmic axes
+        if xlog or ylog:
+            ax2.grid(which="minor", c="#EEEEEE")
+
+    # The axes sharing the same x-axis (the difference plot is present only if a background is given)
+    axes = [ax1, ax2] if background else [ax1]
 
     # If available apply user-specified x-axis ranges
     if enrange:
-        ax1.set_xlim(enrange)
-        if background:
-            ax2.set_xlim(enrange)
+        for ax in axes:
+            ax.set_xlim(enrange)
 
     elif chrange:
-        xrange = [calibration.get_energy(ch) if calibration else ch for ch in chrange]
-        ax1.set_xlim(xrange)
-        if background:
-            ax2.set_xlim(xrange)
+        xrange = calibration.get_energy(np.asarray(chrange)) if calibration else chrange
+        for ax in axes:
+            ax.set_xlim(xrange)
 
     if xlog:
-        ax1.set_xscale("log")
-        if background:
-            ax2.set_xscale("log")
+        for ax in axes:
+            ax.set_xscale("log")
 
-        elif enrange is None and chrange is None:
+        if not background and enrange is None and chrange is None:
             # Determine the starting point of the spectra on the x-axis to avoid blanck region at low energy
-            xstart = 0
-            background_counts = (
-                background.counts if background else [0 for _ in sample.channels]
-            )
-            for x, y1, y2 in zip(sample.channels, background_counts, sample.counts):
-                if y1 > 0 or y2 > 0:
-                    break
-                xstart = x
+            # (the last empty channel before the first non-empty one or the last channel if all are empty)
+            # The x-axis values of the sample channels are already available in `sample_x`.
+            nonzero = sample.counts > 0
+            if not nonzero.any():
+                xstart = sample_x[-1]
+            else:
+                first = int(np.argmax(nonzero))
+                if first > 0:
+                    xstart = sample_x[first - 1]
+                else:
+                    xstart = calibration.get_energy(0) if calibration else 0
 
-            ax1.set_xlim(left=calibration.get_energy(xstart) if calibration else xstart)
-            if background:
-                ax2.set_xlim(
-                    left=calibration.get_energy(xstart) if calibration else xstart
-                )
+            ax1.set_xlim(left=xstart)
 
     else:
-        ax1.set_xlim(left=0)
-
-        if background:
-            ax2.set_xlim(left=0)
+        for ax in axes:
+            ax.set_xlim(left=0)
 
     if ylog:
-        ax1.set_yscale("log")
-
-        if background:
-            ax2.set_yscale("log")
-
-            if yrange is None:
-                ax2.set_ylim(
-                    bottom=min(
-                        [
-                            x if x > 0 else max(difference.counts)
-                            for x in difference.counts
-                        ]
-                    )
-                )
-
-    if yrange:
-        ax1.set_ylim(yrange)
-
-        if background:
-            ax2.set_ylim(yrange)
-
-    else:
-        ax1.set_ylim(ax1.get_ylim())
+        for ax in axes:
+            ax.set_yscale("log")
+
+        if background and yrange is None:
+            # Use the smallest positive value as bottom limit (or the maximum if none is positive)
+            positive = difference.counts[difference.counts > 0]
+            ax2.set_ylim(
+                bottom=positive.min() if positive.size else difference.counts.max()
+            )
 
-        if background:
-            ax2.set_ylim(ax2.get_ylim())
+    for ax in axes:
+        ax.set_ylim(yrange if yrange else ax.get_ylim())
 
     if nuclide and calibration:
 
@@ -250,42 +284,46 @@ def plot_spectrum(
                 )
 
     if prominence:
-        peak_dict = peak_search(difference if background else sample, prominence)
+        peaks = peak_search(difference if background else sample, prominence)
 
         # Define a common y-offset for all the markers and labels
-        moffset = max(sample.counts) / 15
-
-        for index, (channel, counts, energy) in peak_dict.items():
-            x = calibration.get_energy(channel) if calibration else channel
-
-            if background:
-                ax2.scatter(x, counts + moffset, marker=11, c="#CC0000", s=40, zorder=3)
-                ax2.text(
-                    x,
-                    counts + 2 * moffset,
-                    f"{x:.2f}",
-                    size=12,
-                    rotation=90.0,
-                    ha="center",
-                    va="bottom",
-                )
-
-            else:
-                ax1.scatter(x, counts + moffset, marker=11, c="#CC0000", s=40, zorder=3)
-                ax1.text(
-                    x,
-                    counts + 1.3 * moffset,
-                    f"{x:.2f}",
-                    size=12,
-                    rotation=90.0,
-                    ha="center",
-                    va="bottom",
-                )
+        moffset = sample.counts.max() / 15
+
+        # Convert the position of all the peaks to the x-axis scale at once
+        channels = np.array([channel for channel, _, _ in peaks], dtype=np.float64)
+        peaks_x = calibration.get_energy(channels) if calibration else channels
+        peaks_y = np.array([counts for _, counts, _ in peaks], dtype=np.float64)
+
+        # Peaks are marked on the difference plot if a background is given else on the sample one
+        ax = ax2 if background else ax1
+        label_offset = 2 * moffset if background else 1.3 * moffset
+
+        # Draw all the markers as a single collection
+        ax.scatter(peaks_x, peaks_y + moffset, marker=11, c="#CC0000", s=40, zorder=3)
+
+        # Compute the position and text of all the labels before creating the text artists
+        labels_x = peaks_x.tolist()
+        labels_y = (peaks_y + label_offset).tolist()
+        labels = [f"{x:.2f}" for x in labels_x]
+
+        for x, y, label in zip(labels_x, labels_y, labels):
+            ax.text(
+                x,
+                y,
+                label,
+                size=12,
+                rotation=90.0,
+                ha="center",
+                va="bottom",
+            )
 
     plt.tight_layout()
 
     if filename is not None:
-        plt.savefig(filename, dpi=600)
+        if dpi is None:
+            dpi = 600 if splitext(filename)[1].lower() in _VECTOR_FORMATS else 150
+
+        plt.savefig(filename, dpi=dpi)
 
     plt.show()
 
@@ -299,22 +337,18 @@ def plot_calibration(calibration: Calibration) -> None:
     calibration: Calibration
         The calibration object to plot.
     """
+    # Imported here so that loading the module does not initialize the matplotlib backend
+    import matplotlib.pyplot as plt
+
     plt.rc("font", **{"size": 14})
 
     fig = plt.figure(figsize=(6, 6))
 
     plt.scatter(calibration.channels, calibration.energies, marker="+", s=150, c="red")
 
-    xfit, yfit = [], []
-    for i in range(1000):
-        x = (
-            0.8 * min(calibration.channels)
-            + 1.4 * i * (max(calibration.channels) - min(calibration.channels)) / 1000
-        )
-        y = calibration.get_energy(x)
-
-        xfit.append(x)
-        yfit.append(y)
+    cmin, cmax = calibration.channels.min(), calibration.channels.max()
+    xfit = np.linspace(0.8 * cmin, 0.8 * cmin + 1.4 * (cmax - cmin), 1000, endpoint=False)
+    yfit = calibration.get_energy(xfit)
 
     plt.plot(xfit, yfit, c="black", linestyle="--")
 
@@ -0,0 +1,47 @@
+import numpy as np
+from numpy.polynomial.polynomial import polyvander
+
+from pygammaspec.spectrum import GammaSpectrum, Calibration
+from pygammaspec.analysis import unitary_height_gaussian, fit_peak, _peak_model, _peak_model_jacobian
+
+
+def test_peak_model_jacobian():
+
+    x = np.linspace(0.0, 10.0, 51)
+    params = np.array([2.0, 4.5, 1.3, 0.5, -0.1, 0.02])
+    vander = polyvander(x, 2)
+
+    jacobian = _peak_model_jacobian(x, *params[:3], vander)
+
+    # Compare each column with the central finite difference of the model
+    step = 1e-6
+    for i in range(len(params)):
+        shift = np.zeros_like(params)
+        shift[i] = step
+        plus, minus = params + shift, params - shift
+        numerical = (
+            _peak_model(x, *plus[:3], plus[3:]) - _peak_model(x, *minus[:3], minus[3:])
+        ) / (2 * step)
+        assert np.allclose(jacobian[:, i], numerical, rtol=1e-6, atol=1e-8)
+
+
+def test_fit_peak(tmp_path):
+
+    channels = np.arange(1.0, 1001.0)
+    counts = 5.0 * unitary_height_gaussian(channels, 500.0, 12.0) + 0.2 + 0.001 * channels
+
+    path = tmp_path / "spectrum.txt"
+    rows = [f"{channel!r}\t{count!r}\n" for channel, count in zip(channels.tolist(), counts.tolist())]
+    path.write_text("Height/arb.u.\tCounts\n" + "".join(rows))
+
+    spectrum = GammaSpectrum.from_PRA_histogram(str(path), 1)
+    spectrum.calibration = Calibration({0.0: 0.0, 1000.0: 1000.0})
+
+    popt, xarr, yfit, ybaseline, efficiency = fit_peak(spectrum, 400, 600, baseline_order=1)
+
+    assert np.allclose(popt, [5.0, 500.0, 12.0, 0.2, 0.001], rtol=1e-5, atol=1e-8)
+    assert np.all((xarr >= 400) & (xarr <= 600))
+    expected = 5.0 * unitary_height_gaussian(xarr, 500.0, 12.0) + 0.2 + 0.001 * xarr
+    assert np.allclose(yfit, expected, atol=1e-6)
+    assert np.allclose(ybaseline, 0.2 + 0.001 * xarr, atol=1e-6)
+    assert abs(efficiency - 100 * 2 * 12.0 * np.sqrt(2 * np.log(2)) / 500.0) < 1e-4
@@ -0,0 +1,35 @@
+import os
+import shutil
+import numpy as np
+
+import pygammaspec
+from pygammaspec import _load_table
+
+X_RAY_DTYPE = np.dtype([("energy", np.float64), ("element", "U64"), ("shell", "U64")])
+
+
+def test_load_table_strings():
+
+    table = _load_table(pygammaspec.x_ray_datafile_path, X_RAY_DTYPE)
+
+    assert table.dtype["element"].itemsize < X_RAY_DTYPE["element"].itemsize
+    assert all(element == element.strip() for element in table["element"].tolist())
+
+
+def test_load_table_truncated_cache(tmp_path):
+
+    path = str(tmp_path / "x_ray_data.csv")
+    cache_path = str(tmp_path / "x_ray_data.npy")
+    shutil.copy(pygammaspec.x_ray_datafile_path, path)
+
+    # Simulate a cache left empty by an interrupted write
+    open(cache_path, "wb").close()
+    mtime = os.path.getmtime(path) + 10
+    os.utime(cache_path, (mtime, mtime))
+
+    table = _load_table(path, X_RAY_DTYPE)
+    expected = _load_table(pygammaspec.x_ray_datafile_path, X_RAY_DTYPE)
+
+    assert np.array_equal(table, expected)
+    assert np.array_equal(np.load(cache_path, allow_pickle=False), expected)
+    assert sorted(os.listdir(str(tmp_path))) == ["x_ray_data.csv", "x_ray_data.npy"]
@@ -0,0 +1,43 @@
+import pygammaspec
+from pygammaspec.nuclear import (
+    search_gamma_line,
+    decay_products,
+    decay_products_spectrum,
+)
+
+
+def test_search_gamma_line():
+
+    lines = search_gamma_line(661.657, delta=0.5, halflife_threshold=60, intensity_threshold=1)
+
+    assert [line[4] for line in lines].count("Cs-137") == 1
+    for energy, intensity, _, halflife, _, _ in lines:
+        assert abs(energy - 661.657) <= 0.5
+        assert intensity >= 1
+        assert halflife >= 60
+
+
+def test_decay_products_spectrum():
+
+    nuclides = decay_products("Ra-226", branching_ratio_threshold=0.05)
+    emitters, energies = decay_products_spectrum(
+        "Ra-226", branching_ratio_threshold=0.05, limit_intensity=True
+    )
+
+    # Build the expected result with a plain scan of the gamma table, keeping for each nuclide only
+    # the lines with intensity greater than 10% of the highest one
+    expected_emitters, expected_energies = [], []
+    for nuclide in nuclides:
+        rows = [row for row in pygammaspec.DEFAULT_GAMMA_DATA if row[4] == nuclide]
+        if rows == []:
+            continue
+
+        max_intensity = max(row[1] for row in rows)
+        for row in rows:
+            if row[1] > 0.1 * max_intensity:
+                expected_emitters.append(nuclide)
+                expected_energies.append(row[0])
+
+    assert "Bi-214" in emitters
+    assert emitters == expected_emitters
+    assert energies == expected_energies
@@ -1,9 +1,11 @@
+import numpy as np
 from os.path import abspath, dirname, join
-from pygammaspec.spectrum import GammaSpectrum
+from pygammaspec.spectrum import GammaSpectrum, Calibration
 
 # Get the path of the tests directory
 DATA_DIR = join(dirname(abspath(__file__)), "data")
 
+
 def test_GammaSpectrum_init():
 
     try:
@@ -11,3 +13,122 @@ def test_GammaSpectrum_init():
     except:
         assert False, "Exception raised on `GammaSpectrum` class construction"
 
+
+def test_Calibration_get_energy_array():
+
+    calibration = Calibration({1.0: 10.0, 2.0: 40.0, 3.0: 90.0}, order=2)
+    channels = [0.5, 1.0, 2.5, 4.0]
+
+    energies = calibration.get_energy(np.array(channels))
+
+    assert isinstance(energies, np.ndarray)
+    assert isinstance(calibration.get_energy(1.0), float)
+    assert len(energies) == len(channels)
+    for channel, energy in zip(channels, energies):
+        assert abs(calibration.get_energy(channel) - energy) < 1e-9
+        assert abs(10.0 * channel**2 - energy) < 1e-6
+
+
+def test_GammaSpectrum_operations(tmp_path):
+
+    short_path = tmp_path / "short.txt"
+    short_path.write_text("Height/arb.u.\tCounts\n0\t2\n0.01\t4\n0.02\t6\n")
+
+    long_path = tmp_path / "long.txt"
+    long_path.write_text("Height/arb.u.\tCounts\n0\t1\n0.01\t1\n0.02\t1\n0.03\t1\n")
+
+    short = GammaSpectrum.from_PRA_histogram(str(short_path), 2)
+    long = GammaSpectrum.from_PRA_histogram(str(long_path), 1)
+
+    assert list(short.channels) == [0, 0.01, 0.02]
+    assert list(short.counts) == [1, 2, 3]
+    assert short.total_activity == 6
+
+    addition = short + long
+    assert list(addition.channels) == [0, 0.01, 0.02, 0.03]
+    assert list(addition.counts) == [2, 3, 4, 1]
+    assert addition.acquisition_time is None
+
+    difference = short - long
+    assert list(difference.counts) == [0, 1, 2, -1]
+
+
+def test_GammaSpectrum_average_smoothing(tmp_path):
+
+    path = tmp_path / "spectrum.txt"
+    path.write_text("Height/arb.u.\tCounts\n" + "".join(f"{i}\t{i**2}\n" for i in range(10)))
+
+    spectrum = GammaSpectrum.from_PRA_histogram(str(path), 1)
+    smoothed = spectrum.average_smoothing(2)
+
+    assert list(smoothed.channels) == list(range(2, 8))
+    for i, value in zip(range(2, 8), smoothed.counts):
+        assert abs(value - sum(j**2 for j in range(i - 2, i + 3)) / 5) < 1e-9
+
+    try:
+        spectrum.average_smoothing(5)
+    except ValueError:
+        pass
+    else:
+        assert False, "Exception not raised for an averaging window larger than the spectrum"
+
+
+def test_Calibration_from_arrays():
+
+    data = {14.41: 609.312, 9.12: 351.932, 7.86: 295.224, 6.59: 241.997, 5.21: 186.211}
+
+    calibration = Calibration.from_arrays(list(data.keys()), list(data.values()), order=2)
+
+    assert calibration == Calibration(data, order=2)
+    assert calibration.order == 2
+
+    try:
+        Calibration.from_arrays([1.0, 2.0], [1.0, 2.0, 3.0])
+    except ValueError:
+        pass
+    else:
+        assert False, "Exception not raised for channels and energies of different length"
+
+
+def test_Calibration_file_roundtrip(tmp_path):
+
+    calibration = Calibration({14.41: 609.312, 9.12: 351.932, 7.86: 295.224, 5.21: 186.211}, order=2)
+
+    path = tmp_path / "calibration.txt"
+    calibration.save_calibration_file(str(path))
+
+    loaded = Calibration.from_calibration_file(str(path))
+
+    assert loaded == calibration
+    assert loaded.order == 2
+    assert abs(loaded.get_energy(10.0) - calibration.get_energy(10.0)) < 1e-9
+
+
+def test_GammaSpectrum_energy(tmp_path):
+
+    path = tmp_path / "spectrum.txt"
+    path.write_text("Height/arb.u.\tCounts\n1\t0\n2\t0\n3\t0\n")
+
+    spectrum = GammaSpectrum.from_PRA_histogram(str(path), 1)
+
+    try:
+        spectrum.energy
+    except RuntimeError:
+        pass
+    else:
+        assert False, "Exception not raised when accessing the energy of an uncalibrated spectrum"
+
+    spectrum.calibration = Calibration({1.0: 10.0, 3.0: 30.0})
+    for energy, expected in zip(spectrum.energy, [10.0, 20.0, 30.0]):
+        assert abs(energy - expected) < 1e-9
+
+    try:
+        spectrum.energy[0] = 0.0
+    except ValueError:
+        pass
+    else:
+        assert False, "Exception not raised when modifying the cached energy array"
+
+    spectrum.calibration = Calibration({1.0: 20.0, 3.0: 60.0})
+    for energy, expected in zip(spectrum.energy, [20.0, 40.0, 60.0]):
+        assert abs(energy - expected) < 1e-9